@@ -1,36 +1,70 @@
 # backend/api/comics.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from starlette.requests import Request
 from schemas.comic import ComicArtRequest, ComicRequest, ThumbnailRequest
-from services.comic_storage import ComicStorageService
-from services.comic_generator import ComicArtGenerator
+from services.comic_storage import ComicStorageService, decode_base64_data
+from services.comic_generator import ComicArtGenerator, shrink_image
 from services.user_credits import UserCreditsService
 from services.audio_generator import audio_generator
 from auth_shared import get_current_user
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from cachetools import LRUCache
+from typing import List, Literal
 import json
-import base64
+import hashlib
 import os
+import re
 import logging
+import tempfile
+from pathlib import Path
+from urllib.parse import quote
 from PIL import Image
-import httpx
 import io
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/comics", tags=["comics"])
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://"))
 
 comic_generator = ComicArtGenerator()
 comic_storage_service = ComicStorageService()
 credits_service = UserCreditsService()
 
+# Local saved-comics directory (served statically under /panels), resolved once at import
+SAVED_COMICS_DIR = (Path(__file__).resolve().parent.parent / "saved-comics").resolve()
+COMIC_TITLE_PATTERN = re.compile(r"[\w\- ]{1,128}")
+# Generated cover thumbnails live outside the comic directories so writing one doesn't
+# bump a comic's mtime (which list-comics sorts on). The leading dot can't match a title.
+COVERS_CACHE_DIR = SAVED_COMICS_DIR / ".covers"
+
+# Decoded + downscaled reference sketches, keyed by a hash of the base64 payload,
+# so iterating on prompts with the same sketch skips the decode/resize
+_reference_cache = LRUCache(maxsize=32)
+
+async def _prepare_reference_image(reference_image_data: str) -> bytes:
+    """Decode and downscale a base64 reference sketch, reusing recent results"""
+    key = (len(reference_image_data), hashlib.blake2b(reference_image_data.encode('ascii'), digest_size=16).digest())
+    prepared = _reference_cache.get(key)
+    if prepared is None:
+        decoded = await decode_base64_data(reference_image_data)
+        prepared = await run_in_threadpool(shrink_image, decoded)
+        _reference_cache[key] = prepared
+    return prepared
+
 @router.post("/generate")
 @limiter.limit("10/minute")
-async def generate_comic_art(request: Request, comic_request: ComicArtRequest, current_user: dict = Depends(get_current_user)):
+async def generate_comic_art(
+    request: Request,
+    comic_request: ComicArtRequest,
+    image_format: Literal["jpeg", "png"] = Query("jpeg", alias="format"),
+    current_user: dict = Depends(get_current_user)
+) -> dict:
     """
     Generate comic art from text prompt and optional reference image
+    Returns JPEG by default; pass ?format=png for a lossless image
     """
     try:
         # Check if user has sufficient credits (10 credits per panel)
@@ -44,13 +78,24 @@ async def generate_comic_art(request: Request, comic_request: ComicArtRequest, c
         panel_id = comic_request.panel_id
         previous_panel_context = comic_request.previous_panel_context
         
-        logger.debug(f"panel_id={panel_id}, has_previous_context={previous_panel_context is not None}")
+        logger.debug("panel_id=%s, has_previous_context=%s", panel_id, previous_panel_context is not None)
+        
+        if reference_image_data:
+            try:
+                reference_image_data = await _prepare_reference_image(reference_image_data)
+            except Exception as e:
+                logger.warning(f"Error processing reference image, generating without it: {e}", exc_info=True)
+                reference_image_data = None
         
         context_image_data = None
         
         if previous_panel_context:
             context_prompt = f"Create the next scene using this context: {previous_panel_context.prompt}. {text_prompt}"
-            context_image_data = previous_panel_context.image_data
+            try:
+                context_image_data = await decode_base64_data(previous_panel_context.image_data)
+            except Exception as e:
+                logger.warning(f"Error processing context image, generating without it: {e}", exc_info=True)
+                context_image_data = None
             text_prompt = context_prompt
             logger.info(f"Using previous panel context for panel {panel_id}: {context_prompt[:100]}...")
         else:
@@ -64,10 +109,10 @@ async def generate_comic_art(request: Request, comic_request: ComicArtRequest, c
             )
         
         # Generate the comic art with context
-        image = comic_generator.generate_comic_art(text_prompt, reference_image_data, context_image_data)
+        image = await comic_generator.generate_comic_art_async(text_prompt, reference_image_data, context_image_data)
         
         # Convert image to base64 for response
-        img_base64 = comic_generator.image_to_base64(image)
+        img_base64 = await run_in_threadpool(comic_generator.image_to_base64, image, image_format.upper())
         
         # Deduct 10 credits after successful generation (multiplied by 10)
         try:
@@ -84,6 +129,7 @@ async def generate_comic_art(request: Request, comic_request: ComicArtRequest, c
         return {
             'success': True,
             'image_data': img_base64,
+            'mime_type': f"image/{image_format}",
             'message': 'Comic art generated successfully'
         }
         
@@ -96,7 +142,7 @@ async def generate_comic_art(request: Request, comic_request: ComicArtRequest, c
 
 @router.post("/generate-thumbnail")
 @limiter.limit("10/minute")
-async def generate_thumbnail(request: Request, thumbnail_request: ThumbnailRequest, current_user: dict = Depends(get_current_user)):
+async def generate_thumbnail(request: Request, thumbnail_request: ThumbnailRequest, current_user: dict = Depends(get_current_user)) -> dict:
     """
     Generate a thumbnail image based on comic prompts
     Returns a 3:4 aspect ratio image suitable for comic book covers
@@ -110,7 +156,7 @@ async def generate_thumbnail(request: Request, thumbnail_request: ThumbnailReque
             )
         # Combine all prompts into a single prompt for thumbnail generation
         combined_prompt = f"Comic book cover art featuring: {', '.join(thumbnail_request.prompts[:3])}"  # Use first 3 prompts
-        logger.debug(f"Generating thumbnail with prompt: {combined_prompt}")
+        logger.debug("Generating thumbnail with prompt: %s", combined_prompt)
 
         # Generate comic art using the service
         if not comic_generator:
@@ -120,16 +166,16 @@ async def generate_thumbnail(request: Request, thumbnail_request: ThumbnailReque
             )
 
         # Generate the thumbnail with portrait orientation
-        image = comic_generator.generate_comic_art(combined_prompt, None, None, is_thumbnail=True)
+        image = await comic_generator.generate_comic_art_async(combined_prompt, None, None, is_thumbnail=True)
 
         # Ensure it's exactly 600x800 (3:4 aspect ratio)
         target_width = 600
         target_height = 800
         if image.size != (target_width, target_height):
-            image = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            image = await run_in_threadpool(image.resize, (target_width, target_height), Image.Resampling.LANCZOS)
 
-        # Convert image to base64 for response
-        img_base64 = comic_generator.image_to_base64(image)
+        # Convert image to base64 for response (PNG, since it is stored as the comic's thumbnail.png)
+        img_base64 = await run_in_threadpool(comic_generator.image_to_base64, image, 'PNG')
 
         # Deduct 10 credits after successful generation (multiplied by 10)
         try:
@@ -164,8 +210,10 @@ async def save_comic(request: Request, current_user: dict = Depends(get_current_
     try:
         # First, let's see the raw request data
         raw_data = await request.json()
-        logger.debug(f"Raw request data: {json.dumps(raw_data, indent=2)}")
-        logger.debug(f"Raw data keys: {list(raw_data.keys())}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # Serializing the full payload (base64 panels included) is expensive, only do it when debugging
+            logger.debug("Raw request data: %s", json.dumps(raw_data, indent=2))
+            logger.debug("Raw data keys: %s", list(raw_data.keys()))
         logger.info(f"Authenticated user: {current_user.get('email', 'Unknown')} (ID: {current_user.get('id', 'Unknown')})")
         
         # Handle both old and new frontend formats
@@ -196,13 +244,13 @@ async def save_comic(request: Request, current_user: dict = Depends(get_current_
             logger.error(f"Error converting panel data to dicts: {conv_err}", exc_info=True)
             raise HTTPException(status_code=400, detail=f"Invalid panels data: {conv_err}")
 
-        logger.debug(f"Prepared panels_payload count: {len(panels_payload)}")
-        if panels_payload:
-            logger.debug(f"First panel keys: {list(panels_payload[0].keys())}")
-            logger.debug(f"First panel has narration: {bool(panels_payload[0].get('narration'))}")
-            logger.debug(f"First panel has audio_data: {bool(panels_payload[0].get('audio_data'))}")
+        logger.debug("Prepared panels_payload count: %s", len(panels_payload))
+        if panels_payload and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("First panel keys: %s", list(panels_payload[0].keys()))
+            logger.debug("First panel has narration: %s", bool(panels_payload[0].get('narration')))
+            logger.debug("First panel has audio_data: %s", bool(panels_payload[0].get('audio_data')))
             if panels_payload[0].get('audio_data'):
-                logger.debug(f"First panel audio_data length: {len(panels_payload[0]['audio_data'])}")
+                logger.debug("First panel audio_data length: %s", len(panels_payload[0]['audio_data']))
 
         # Use the authenticated user's ID
         user_id = current_user.get('id')
@@ -233,8 +281,8 @@ async def save_comic(request: Request, current_user: dict = Depends(get_current_
                         panels_with_audio.append(panel)
                         continue
                     
-                    # Generate audio using the audio generator
-                    generated_audio = await audio_generator.generate_audio_base64(narration)
+                    # Generate audio using the audio generator; raw MP3 bytes go straight to storage
+                    generated_audio = await audio_generator.generate_audio(narration)
                     
                     # Update panel with generated audio
                     panel['audio_data'] = generated_audio
@@ -288,7 +336,7 @@ async def regenerate_panel_image(request: Request, panel_id: str, current_user:
         
         # Verify the panel exists and belongs to the user
         user_id = current_user.get('id')
-        panel_check = comic_storage_service.supabase.table('comic_panels').select('id, comic_id, panel_number').eq('id', panel_id).execute()
+        panel_check = await run_in_threadpool(comic_storage_service.supabase.table('comic_panels').select('id, comic_id, panel_number').eq('id', panel_id).execute)
         
         if not panel_check.data:
             raise HTTPException(status_code=404, detail="Panel not found")
@@ -298,7 +346,7 @@ async def regenerate_panel_image(request: Request, panel_id: str, current_user:
         panel_number = panel_data['panel_number']
         
         # Check if the comic belongs to the user
-        comic_check = comic_storage_service.supabase.table('comics').select('id').eq('id', comic_id).eq('user_id', user_id).execute()
+        comic_check = await run_in_threadpool(comic_storage_service.supabase.table('comics').select('id').eq('id', comic_id).eq('user_id', user_id).execute)
         
         if not comic_check.data:
             raise HTTPException(status_code=403, detail="You don't have permission to edit this panel")
@@ -310,19 +358,24 @@ async def regenerate_panel_image(request: Request, panel_id: str, current_user:
             context_prompt_value = previous_panel_context.get('prompt')
             raw_context_image = previous_panel_context.get('image_data')
 
-            # If the context image looks like a URL, fetch and base64-encode it
+            # If the context image looks like a URL, fetch the raw bytes
             if isinstance(raw_context_image, str) and raw_context_image.startswith('http'):
                 try:
-                    async with httpx.AsyncClient(timeout=20) as client:
-                        resp = await client.get(raw_context_image)
-                        resp.raise_for_status()
-                        context_image_data = base64.b64encode(resp.content).decode('utf-8')
-                        logger.info("Fetched context image from URL for regeneration")
+                    resp = await request.app.state.http_client.get(raw_context_image, timeout=20)
+                    resp.raise_for_status()
+                    context_image_data = resp.content
+                    logger.info("Fetched context image from URL for regeneration")
                 except Exception as fetch_err:
                     logger.warning(f"Failed to fetch context image from URL: {fetch_err}")
                     context_image_data = None
-            else:
-                context_image_data = raw_context_image
+            elif isinstance(raw_context_image, str) and raw_context_image:
+                try:
+                    context_image_data = await decode_base64_data(raw_context_image)
+                except Exception as decode_err:
+                    logger.warning(f"Failed to decode context image, regenerating without it: {decode_err}")
+                    context_image_data = None
+            elif raw_context_image:
+                logger.warning(f"Ignoring context image of unexpected type {type(raw_context_image).__name__}")
 
             text_prompt = f"Create the next scene using this context: {context_prompt_value}. {text_prompt}"
             logger.info("Using provided previous panel context for panel regeneration")
@@ -331,19 +384,18 @@ async def regenerate_panel_image(request: Request, panel_id: str, current_user:
             try:
                 # For panel 1 use thumbnail (panel 0); otherwise use (panel_number - 1)
                 prev_number = 0 if panel_number == 1 else (panel_number - 1)
-                prev_panel_resp = comic_storage_service.supabase.table('comic_panels') \
+                prev_panel_resp = await run_in_threadpool(comic_storage_service.supabase.table('comic_panels') \
                     .select('public_url,prompt,panel_number') \
-                    .eq('comic_id', comic_id).eq('panel_number', prev_number).execute()
+                    .eq('comic_id', comic_id).eq('panel_number', prev_number).execute)
                 if prev_panel_resp.data:
                     prev = prev_panel_resp.data[0]
                     prev_url = prev.get('public_url')
                     prev_prompt = prev.get('prompt')
                     if prev_url:
-                        async with httpx.AsyncClient(timeout=20) as client:
-                            resp = await client.get(prev_url)
-                            resp.raise_for_status()
-                            context_image_data = base64.b64encode(resp.content).decode('utf-8')
-                            logger.info(f"Auto-fetched context image from panel {prev_number}")
+                        resp = await request.app.state.http_client.get(prev_url, timeout=20)
+                        resp.raise_for_status()
+                        context_image_data = resp.content
+                        logger.info(f"Auto-fetched context image from panel {prev_number}")
                     if prev_prompt:
                         text_prompt = f"Create the next scene using this context: {prev_prompt}. {text_prompt}"
                 else:
@@ -352,17 +404,17 @@ async def regenerate_panel_image(request: Request, panel_id: str, current_user:
                 logger.warning(f"Failed to infer previous panel context: {infer_err}")
         
         # Generate the new image
-        image = comic_generator.generate_comic_art(text_prompt, None, context_image_data)
+        image = await comic_generator.generate_comic_art_async(text_prompt, None, context_image_data)
         
-        # Convert to base64 for storage
-        img_base64 = comic_generator.image_to_base64(image)
+        # Encode as PNG for storage
+        img_bytes = await run_in_threadpool(comic_generator.image_to_bytes, image, 'PNG')
         
         # Upload the image to Supabase storage
         try:
-            img_bytes = base64.b64decode(img_base64)
             file_path = f"users/{user_id}/comics/{comic_id}/panels/panel_{panel_number}_regenerated_{os.urandom(4).hex()}.png"
             
-            upload_result = comic_storage_service.supabase.storage.from_('PixelPanel').upload(
+            upload_result = await run_in_threadpool(
+                comic_storage_service.supabase.storage.from_('PixelPanel').upload,
                 file_path,
                 img_bytes,
                 {'content-type': 'image/png', 'upsert': 'true'}
@@ -372,10 +424,10 @@ async def regenerate_panel_image(request: Request, panel_id: str, current_user:
             public_url = comic_storage_service.supabase.storage.from_('PixelPanel').get_public_url(file_path)
             
             # Update the panel in the database with new image URL and prompt
-            update_result = comic_storage_service.supabase.table('comic_panels').update({
+            update_result = await run_in_threadpool(comic_storage_service.supabase.table('comic_panels').update({
                 'public_url': public_url,
                 'prompt': text_prompt
-            }).eq('id', panel_id).execute()
+            }).eq('id', panel_id).execute)
             
             if not update_result.data:
                 raise HTTPException(status_code=500, detail="Failed to update panel")
@@ -432,13 +484,13 @@ async def update_panel(request: Request, panel_id: str, current_user: dict = Dep
         
         # First, verify the panel exists and belongs to the user
         user_id = current_user.get('id')
-        panel_check = comic_storage_service.supabase.table('comic_panels').select('id, comic_id, panel_number').eq('id', panel_id).execute()
+        panel_check = await run_in_threadpool(comic_storage_service.supabase.table('comic_panels').select('id, comic_id, panel_number').eq('id', panel_id).execute)
         
         if not panel_check.data:
             raise HTTPException(status_code=404, detail="Panel not found")
         
         # Check if the comic belongs to the user
-        comic_check = comic_storage_service.supabase.table('comics').select('id').eq('id', panel_check.data[0]['comic_id']).eq('user_id', user_id).execute()
+        comic_check = await run_in_threadpool(comic_storage_service.supabase.table('comics').select('id').eq('id', panel_check.data[0]['comic_id']).eq('user_id', user_id).execute)
         
         if not comic_check.data:
             raise HTTPException(status_code=403, detail="You don't have permission to edit this panel")
@@ -454,12 +506,12 @@ async def update_panel(request: Request, panel_id: str, current_user: dict = Dep
                 )
             try:
                 logger.info(f"Generating updated audio for panel {panel_id}")
-                # Generate audio base64
-                audio_b64 = await audio_generator.generate_audio_base64(narration)
+                # Generate audio bytes
+                audio_bytes = await audio_generator.generate_audio(narration)
                 # Upload to storage with upsert
                 audio_storage_path = f"users/{user_id}/comics/{panel_check.data[0]['comic_id']}/audio/panel_{panel_check.data[0]['panel_number']}.mp3"
-                audio_bytes = base64.b64decode(audio_b64)
-                comic_storage_service.supabase.storage.from_('PixelPanel').upload(
+                await run_in_threadpool(
+                    comic_storage_service.supabase.storage.from_('PixelPanel').upload,
                     path=audio_storage_path,
                     file=audio_bytes,
                     file_options={"content-type": "audio/mpeg", "upsert": "true"}
@@ -476,7 +528,7 @@ async def update_panel(request: Request, panel_id: str, current_user: dict = Dep
                 logger.error(f"Failed to generate/upload updated audio for panel {panel_id}: {audio_err}", exc_info=True)
 
         # Update the panel in the database
-        result = comic_storage_service.supabase.table('comic_panels').update(update_data).eq('id', panel_id).execute()
+        result = await run_in_threadpool(comic_storage_service.supabase.table('comic_panels').update(update_data).eq('id', panel_id).execute)
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to update panel")
@@ -492,7 +544,7 @@ async def update_panel(request: Request, panel_id: str, current_user: dict = Dep
 
 @router.get("/user-comics")
 @limiter.limit("50/minute")
-async def get_user_comics(request: Request, current_user: dict = Depends(get_current_user)):
+async def get_user_comics(request: Request, current_user: dict = Depends(get_current_user)) -> dict:
     """
     Get all comics for the authenticated user from Supabase
     """
@@ -512,7 +564,7 @@ async def get_user_comics(request: Request, current_user: dict = Depends(get_cur
 
 @router.get("/public-comics")
 @limiter.limit("50/minute")
-async def get_public_comics(request: Request):
+async def get_public_comics(request: Request) -> dict:
     """
     Get all public comics from all users for the explore page
     """
@@ -546,10 +598,10 @@ async def update_comic_visibility(comic_id: str, request: Request, current_user:
         # If trying to make public, validate that comic is complete
         if is_public:
             # Get comic data to validate completeness
-            comic_response = comic_storage_service.supabase.table('comics').select("""
+            comic_response = await run_in_threadpool(comic_storage_service.supabase.table('comics').select("""
                 id, title, user_id, is_public, created_at, updated_at,
                 comic_panels(id, panel_number, public_url, storage_path, file_size, created_at, narration, audio_url)
-            """).eq('id', comic_id).eq('user_id', user_id).execute()
+            """).eq('id', comic_id).eq('user_id', user_id).execute)
             
             if not comic_response.data:
                 raise HTTPException(status_code=404, detail='Comic not found or unauthorized')
@@ -574,9 +626,9 @@ async def update_comic_visibility(comic_id: str, request: Request, current_user:
                 raise HTTPException(status_code=400, detail='Cannot publish: Comic thumbnail is required')
 
         # Update comic visibility in database
-        response = comic_storage_service.supabase.table('comics').update({
+        response = await run_in_threadpool(comic_storage_service.supabase.table('comics').update({
             'is_public': is_public
-        }).eq('id', comic_id).eq('user_id', user_id).execute()
+        }).eq('id', comic_id).eq('user_id', user_id).execute)
 
         if not response.data:
             raise HTTPException(status_code=404, detail='Comic not found or unauthorized')
@@ -590,52 +642,68 @@ async def update_comic_visibility(comic_id: str, request: Request, current_user:
         logger.error(f"Error updating comic visibility: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _saved_comic_dir(comic_title: str) -> Path:
+    """Resolve a saved comic's directory, rejecting titles that could escape SAVED_COMICS_DIR"""
+    if not COMIC_TITLE_PATTERN.fullmatch(comic_title):
+        raise HTTPException(status_code=400, detail="Invalid comic title")
+    comic_dir = (SAVED_COMICS_DIR / comic_title).resolve()
+    if not comic_dir.is_relative_to(SAVED_COMICS_DIR):
+        raise HTTPException(status_code=400, detail="Invalid comic title")
+    return comic_dir
+
+def _panel_urls(comic_title: str, panel_entries: List[os.DirEntry]) -> List[dict]:
+    """
+    Build static URLs for a saved comic's panel files
+    The mtime query string busts the long-lived browser cache when a panel is re-saved
+    """
+    panels = []
+    for entry in panel_entries:
+        panel_number = entry.name[len("panel_"):-len(".png")]
+        if not panel_number.isdigit():
+            continue
+        panels.append({
+            'id': int(panel_number),
+            'image_url': f"/panels/{quote(comic_title)}/{entry.name}?v={entry.stat().st_mtime_ns:x}"
+        })
+    panels.sort(key=lambda panel: panel['id'])
+    return panels
+
 @router.get("/list-comics")
 @limiter.limit("50/minute")
-async def list_comics(request: Request):
+async def list_comics(request: Request) -> dict:
     """
     List all saved comics in the project directory
     """
     try:
-        import glob
-        
-        # Look for saved comics directory
-        saved_comics_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'saved-comics')
-        
-        if not os.path.exists(saved_comics_dir):
+        # Get all comic directories in one pass, reusing the cached DirEntry stat
+        try:
+            with os.scandir(SAVED_COMICS_DIR) as it:
+                comic_entries = [entry for entry in it if entry.is_dir() and not entry.name.startswith(".")]
+        except FileNotFoundError:
             return {'comics': []}
         
-        # Get all comic directories
-        comic_dirs = [d for d in os.listdir(saved_comics_dir) 
-                     if os.path.isdir(os.path.join(saved_comics_dir, d))]
-        
         # Sort by modification time (newest first)
-        comic_dirs.sort(key=lambda x: os.path.getmtime(os.path.join(saved_comics_dir, x)), reverse=True)
+        comic_entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
         
         comics = []
-        for comic_dir in comic_dirs:
+        for comic_entry in comic_entries:
             # Check if it has panel files
-            panel_files = glob.glob(os.path.join(saved_comics_dir, comic_dir, "panel_*.png"))
-            if panel_files:
+            with os.scandir(comic_entry.path) as it:
+                panel_entries = [p for p in it if p.name.startswith("panel_") and p.name.endswith(".png")]
+            if panel_entries:
                 # Check for panel 1 as cover image
-                panel_1_path = os.path.join(saved_comics_dir, comic_dir, "panel_1.png")
-                has_cover = os.path.exists(panel_1_path)
+                has_cover = any(p.name == "panel_1.png" for p in panel_entries)
                 
                 comic_data = {
-                    'title': comic_dir,
-                    'panel_count': len(panel_files),
-                    'has_cover': has_cover
+                    'title': comic_entry.name,
+                    'panel_count': len(panel_entries),
+                    'has_cover': has_cover,
+                    'panels': _panel_urls(comic_entry.name, panel_entries)
                 }
                 
-                # If panel 1 exists, include it as cover image
-                if has_cover:
-                    try:
-                        with open(panel_1_path, 'rb') as f:
-                            cover_bytes = f.read()
-                            cover_base64 = base64.b64encode(cover_bytes).decode('utf-8')
-                            comic_data['cover_image'] = f"data:image/png;base64,{cover_base64}"
-                    except Exception as e:
-                        logger.warning(f"Error reading panel 1 as cover for {comic_dir}: {e}")
+                # Covers are served separately as small cached JPEGs
+                if has_cover and COMIC_TITLE_PATTERN.fullmatch(comic_entry.name):
+                    comic_data['cover_url'] = f"{router.prefix}/cover/{quote(comic_entry.name)}"
                 
                 comics.append(comic_data)
         
@@ -645,6 +713,64 @@ async def list_comics(request: Request):
         logger.error(f"Error listing comics: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _build_cover(panel_path: Path, cover_path: Path) -> None:
+    """
+    Render a small JPEG cover from a comic's first panel
+    Written to a temp file and renamed into place so concurrent workers never serve a partial JPEG
+    """
+    cover_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cover_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file, Image.open(panel_path) as img:
+            img.thumbnail((256, 256), Image.Resampling.LANCZOS)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img.save(tmp_file, "JPEG", quality=75)
+        os.replace(tmp_path, cover_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+@router.get("/cover/{comic_title}")
+@limiter.limit("200/minute")
+async def get_comic_cover(request: Request, comic_title: str):
+    """
+    Serve the cover thumbnail for a saved comic, generating it on first request
+    """
+    comic_dir = _saved_comic_dir(comic_title)
+    panel_1_path = comic_dir / "panel_1.png"
+    cover_path = COVERS_CACHE_DIR / f"{comic_dir.name}.jpg"
+    
+    try:
+        panel_1_mtime = panel_1_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Comic cover not found")
+    
+    try:
+        # (Re)build the cover if it is missing or older than panel 1
+        try:
+            cover_mtime = cover_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            cover_mtime = None
+        if cover_mtime is None or cover_mtime < panel_1_mtime:
+            await run_in_threadpool(_build_cover, panel_1_path, cover_path)
+            cover_mtime = cover_path.stat().st_mtime_ns
+    except Exception as e:
+        logger.error(f"Error building cover for {comic_title}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    etag = f'"{cover_mtime:x}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return FileResponse(
+        cover_path,
+        media_type="image/jpeg",
+        headers={"ETag": etag, "Cache-Control": "public, no-cache"}
+    )
 
 @router.delete("/user-comics/{comic_id}")
 @limiter.limit("30/minute")
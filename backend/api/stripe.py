@@ -23,7 +23,7 @@ supabase_key = os.getenv('SUPABASE_SERVICE_KEY')  # Use service key for admin op
 supabase = create_client(supabase_url, supabase_key)
 
 router = APIRouter(prefix="/api/stripe", tags=["stripe"])
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://"))
 
 # Subscription Plans Configuration
 SUBSCRIPTION_PLANS = {
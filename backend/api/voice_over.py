@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Body, Depends, HTTPException, Request
-from services.audio_generator import AudioGenerator
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from services.audio_generator import audio_generator
 from services.user_credits import UserCreditsService
 from auth_shared import get_current_user
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 import google.generativeai as genai
+import httpx
 import os
 import json
 import logging
+from typing import Optional
 
 from dotenv import load_dotenv
 
@@ -21,11 +25,10 @@ if not api_key:
     raise ValueError("GOOGLE_API_KEY not found in environment variables")
 
 genai.configure(api_key=api_key)
-audio_generator = AudioGenerator()
 credits_service = UserCreditsService()
 
 router = APIRouter(prefix="/api/voice-over")
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://"))
 
 async def generate_story(story: str):
     """
@@ -40,7 +43,7 @@ async def generate_story(story: str):
 
     try:
         model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(prompt)
+        response = await model.generate_content_async(prompt)
 
         story_content = response.text
         logger.info(f"Generated story ({len(story_content)} chars): {story_content[:100]}..." if len(story_content) > 100 else f"Generated story: {story_content}")
@@ -74,15 +77,15 @@ async def generate_story_endpoint(request: Request, story: str = Body(..., embed
     # Parse the result to ensure it's valid JSON
     try:
         parsed_result = json.loads(result)
-        logger.debug(f"Parsed story result: {parsed_result}")
+        logger.debug("Parsed story result: %s", parsed_result)
         return parsed_result
     except json.JSONDecodeError:
-        logger.debug(f"JSON decode error, returning as story: {result}")
+        logger.debug("JSON decode error, returning as story: %s", result)
         return {"story": result}
 
 @router.post("/generate-voiceover")
 @limiter.limit("10/minute")
-async def generate_narration(request: Request, narration: str, current_user: dict = Depends(get_current_user)):
+async def generate_narration(request: Request, narration: str, current_user: dict = Depends(get_current_user)) -> dict:
     """
     Generate voice narration
     """
@@ -110,3 +113,51 @@ async def generate_narration(request: Request, narration: str, current_user: dic
     except Exception as e:
         logger.error(f"Error generating voiceover: {e}", exc_info=True)
         return {"error": str(e), "audio": None}
+
+@router.post("/generate-voiceover/stream")
+@limiter.limit("10/minute")
+async def stream_narration(request: Request, narration: str, voice_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """
+    Generate voice narration and stream the MP3 to the client as it is synthesized
+    """
+    # Check if user has sufficient credits (1 credit per narration)
+    if not await credits_service.has_sufficient_credits(current_user["id"], 1):
+        raise HTTPException(
+            status_code=402, 
+            detail="Insufficient credits. Please purchase more credits to generate voice narrations."
+        )
+    
+    try:
+        upstream = await audio_generator.open_audio_stream(narration, voice_id=voice_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except httpx.HTTPError as e:
+        logger.error(f"Error starting voiceover stream: {e}", exc_info=True)
+        raise HTTPException(status_code=502, detail="Failed to generate voiceover")
+    
+    # Deduct 1 credit as soon as synthesis has started, so disconnecting before the
+    # last chunk doesn't get the narration for free
+    try:
+        new_balance = await credits_service.deduct_credits(current_user["id"], 1)
+        logger.info(f"Deducted 1 credit from user {current_user['id']} for streamed voice generation. New balance: {new_balance}")
+    except Exception as credit_error:
+        logger.error(f"Failed to deduct credits for user {current_user['id']}: {credit_error}")
+    except BaseException:
+        # Request cancelled before the response exists - don't leak the upstream connection
+        await upstream.aclose()
+        raise
+    
+    async def stream_audio():
+        try:
+            async for chunk in upstream.aiter_bytes(65536):
+                yield chunk
+        finally:
+            await upstream.aclose()
+    
+    return StreamingResponse(
+        stream_audio(),
+        media_type="audio/mpeg",
+        headers={"Content-Disposition": "inline; filename=voiceover.mp3"},
+        # Also release the pooled connection if the body is never iterated
+        background=BackgroundTask(upstream.aclose)
+    )
@@ -1,7 +1,14 @@
 # backend/auth_shared.py
 from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from cachetools import TLRUCache
+from typing import Optional
 import os
+import time
+import asyncio
+import hashlib
 import httpx
+import jwt
 import logging
 from supabase import create_client, Client
 from dotenv import load_dotenv
@@ -15,6 +22,90 @@ supabase_url = os.getenv('SUPABASE_URL')
 supabase_anon_key = os.getenv('SUPABASE_ANON_KEY')
 supabase: Client = create_client(supabase_url, supabase_anon_key)
 
+# Local JWT verification: asymmetric keys come from the project's JWKS (refreshed
+# hourly), legacy HS256 projects verify against the shared JWT secret
+supabase_jwt_secret = os.getenv('SUPABASE_JWT_SECRET')
+_jwks_client = jwt.PyJWKClient(
+    f"{supabase_url}/auth/v1/.well-known/jwks.json",
+    cache_jwk_set=True,
+    lifespan=3600
+)
+
+# Cache of verified tokens (keyed by SHA-256 of the token) so repeated requests
+# from the same session skip the round-trip to Supabase. Entries never outlive
+# the token's own `exp` claim.
+AUTH_CACHE_TTL = 180
+_auth_cache = TLRUCache(
+    maxsize=10_000,
+    ttu=lambda _key, value, now: min(now + AUTH_CACHE_TTL, value[0]),
+    timer=time.time
+)
+_auth_cache_lock = asyncio.Lock()
+
+def _token_expiry(token: str) -> float:
+    """Read the `exp` claim without verifying the signature (Supabase already did)"""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+        return float(claims.get("exp", 0))
+    except jwt.PyJWTError:
+        return 0.0
+
+def _verify_token_locally(token: str) -> Optional[dict]:
+    """
+    Verify the token signature and claims without calling Supabase
+    Returns the decoded claims, or None if the token can't be verified locally
+    (HS256 token but no SUPABASE_JWT_SECRET configured)
+    """
+    alg = jwt.get_unverified_header(token).get("alg")
+    if alg == "HS256":
+        if not supabase_jwt_secret:
+            return None
+        return jwt.decode(token, supabase_jwt_secret, algorithms=["HS256"], audience="authenticated")
+    
+    signing_key = _jwks_client.get_signing_key_from_jwt(token).key
+    return jwt.decode(token, signing_key, algorithms=["RS256", "ES256"], audience="authenticated")
+
+async def _fetch_user_from_supabase(request: Request, token: str) -> dict:
+    """Validate the token against Supabase's /auth/v1/user endpoint (cached by token hash)"""
+    cache_key = hashlib.sha256(token.encode()).digest()
+    async with _auth_cache_lock:
+        cached = _auth_cache.get(cache_key)
+    if cached is not None:
+        return cached[1]
+    
+    # Verify token with Supabase using the app-wide pooled client
+    client: httpx.AsyncClient = request.app.state.http_client
+    auth_response = await client.get(
+        f"{supabase_url}/auth/v1/user",
+        headers={
+            "Authorization": f"Bearer {token}",
+            "apikey": supabase_anon_key
+        }
+    )
+
+    if auth_response.status_code != 200:
+        logger.warning(f"Token verification failed with status: {auth_response.status_code}")
+        async with _auth_cache_lock:
+            _auth_cache.pop(cache_key, None)
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token"
+        )
+
+    user_data = auth_response.json()
+    user = {
+        "id": user_data.get("id"),
+        "email": user_data.get("email"),
+        "user_metadata": user_data.get("user_metadata", {})
+    }
+
+    expires_at = _token_expiry(token)
+    if expires_at > time.time():
+        async with _auth_cache_lock:
+            _auth_cache[cache_key] = (expires_at, user)
+
+    return user
+
 async def get_current_user(request: Request) -> dict:
     """
     Extract and validate JWT token from Authorization header
@@ -23,7 +114,7 @@ async def get_current_user(request: Request) -> dict:
     try:
         # Get the Authorization header
         auth_header = request.headers.get("Authorization")
-        logger.debug(f"Auth header present: {bool(auth_header)}")
+        logger.debug("Auth header present: %s", bool(auth_header))
         
         if not auth_header or not auth_header.startswith("Bearer "):
             logger.warning("Missing or invalid Authorization header")
@@ -34,12 +125,11 @@ async def get_current_user(request: Request) -> dict:
         
         # Extract the token
         token = auth_header.split(" ")[1]
-        logger.debug(f"Token length: {len(token)}")
-        logger.debug(f"Token starts with: {token[:50]}...")
+        logger.debug("Token length: %s", len(token))
         
         # Check if token has proper JWT structure (3 parts separated by dots)
         token_parts = token.split('.')
-        logger.debug(f"Token parts count: {len(token_parts)}")
+        logger.debug("Token parts count: %s", len(token_parts))
         
         if len(token_parts) != 3:
             logger.warning("Invalid JWT token structure")
@@ -49,33 +139,33 @@ async def get_current_user(request: Request) -> dict:
             )
         
         try:
-            # Verify token with Supabase
-            async with httpx.AsyncClient() as client:
-                auth_response = await client.get(
-                    f"{supabase_url}/auth/v1/user",
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "apikey": supabase_anon_key
-                    }
-                )
-                
-                if auth_response.status_code != 200:
-                    logger.warning(f"Token verification failed with status: {auth_response.status_code}")
-                    raise HTTPException(
-                        status_code=401,
-                        detail="Invalid or expired token"
-                    )
-                
-                user_data = auth_response.json()
-                user_id = user_data.get("id")
-                logger.info(f"User authenticated: {user_data.get('email', 'Unknown')} with ID: {user_id}")
-                
-                return {
-                    "id": user_id,
-                    "email": user_data.get("email"),
-                    "user_metadata": user_data.get("user_metadata", {})
+            try:
+                claims = await run_in_threadpool(_verify_token_locally, token)
+            except jwt.PyJWKClientError as e:
+                # JWKS unavailable or no matching key - fall back to asking Supabase
+                logger.warning(f"Local JWT verification unavailable, falling back to Supabase: {e}")
+                claims = None
+            
+            if claims is not None:
+                user = {
+                    "id": claims["sub"],
+                    "email": claims.get("email"),
+                    "user_metadata": claims.get("user_metadata", {})
                 }
-                
+            else:
+                user = await _fetch_user_from_supabase(request, token)
+            
+            logger.info(f"User authenticated: {user.get('email') or 'Unknown'} with ID: {user['id']}")
+            return user
+
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"Token verification failed: {e}")
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid or expired token"
+            )
+        except HTTPException:
+            raise
         except httpx.HTTPError as e:
             logger.error(f"JWT verification HTTP error: {e}", exc_info=True)
             raise HTTPException(
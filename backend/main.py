@@ -1,34 +1,66 @@
+from contextlib import asynccontextmanager
 from fastapi import HTTPException, FastAPI
 from starlette.requests import Request
 import uvicorn
+import httpx
 import logging
+import queue
+import atexit
 import sys
 import os
+from logging.handlers import QueueHandler, QueueListener
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from api.comics import router as comics_router
+from api.comics import router as comics_router, SAVED_COMICS_DIR
 from api.voice_over import router as voice_over_router
 from api.stripe import router as stripe_router 
+from services.audio_generator import audio_generator
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure logging: handlers enqueue records and a background thread writes them to
+# stdout, so request handlers never block on console I/O. Level comes from LOG_LEVEL.
+log_queue = queue.SimpleQueue()
+stdout_handler = logging.StreamHandler(sys.stdout)
+stdout_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = QueueListener(log_queue, stdout_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# Attach the QueueHandler directly (not via basicConfig) so records are only
+# formatted once, by the listener's stdout handler
+root_logger = logging.getLogger()
+root_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+root_logger.addHandler(QueueHandler(log_queue))
 
 logger = logging.getLogger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Initialize rate limiter. Counters live in RATE_LIMIT_STORAGE_URI (e.g. redis://...) so
+# limits hold across uvicorn workers; the in-memory default only works with one worker.
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled HTTP client across requests for the lifetime of the app"""
+    app.state.http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=30.0
+    )
+    audio_generator.http_client = app.state.http_client
+    try:
+        yield
+    finally:
+        audio_generator.http_client = None
+        await app.state.http_client.aclose()
 
-app = FastAPI(title="PixelPanel", version="1.0.0")
+# Endpoints returning large payloads declare a `-> dict` return type so FastAPI
+# serializes them straight to JSON bytes in pydantic-core (requires fastapi>=0.130)
+app = FastAPI(title="PixelPanel", version="1.0.0", lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -59,6 +91,17 @@ async def health_check(request: Request):
     """Health check endpoint"""
     return {"status": "healthy", "message": "API is running"}
 
+class ImmutableStaticFiles(StaticFiles):
+    """Static files with long-lived cache headers; URLs carry a version query string"""
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+# Serve saved comic panels directly instead of inlining them as base64
+# (check_dir=False: the directory may not exist yet; missing files are just 404s)
+app.mount("/panels", ImmutableStaticFiles(directory=SAVED_COMICS_DIR, check_dir=False), name="panels")
+
 # Include the new API routers
 app.include_router(comics_router)
 app.include_router(voice_over_router)
@@ -66,4 +109,9 @@ app.include_router(stripe_router)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    # Multiple worker processes so image encoding and base64 work isn't serialized on one GIL.
+    # Without shared rate-limit storage every worker would get its own limit, so default to one.
+    default_workers = 1 if RATE_LIMIT_STORAGE_URI.startswith("memory://") else (os.cpu_count() or 1)
+    workers = int(os.environ.get("WEB_CONCURRENCY", default_workers))
+    # log_config=None lets uvicorn's loggers propagate to the queue-backed root handler
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers, log_config=None)
\ No newline at end of file
@@ -4,11 +4,13 @@ Generates high-quality audio from text input
 """
 
 import os
+import re
 import base64
 import httpx
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Dict, Any, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -16,6 +18,9 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# ElevenLabs voice IDs are short alphanumeric strings
+VOICE_ID_PATTERN = re.compile(r"[A-Za-z0-9]{1,64}")
+
 class AudioGenerator:
     """
     ElevenLabs Text-to-Speech Audio Generator
@@ -42,6 +47,21 @@ class AudioGenerator:
         # Default voice ID - you can change this to your preferred voice
         self.default_voice_id = "21m00Tcm4TlvDq8ikWAM"  # Rachel voice
         
+        # Shared pooled client, set by the FastAPI lifespan when running in the app
+        self.http_client: Optional[httpx.AsyncClient] = None
+        
+    @asynccontextmanager
+    async def _client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Yield the shared HTTP client if one is attached, otherwise a short-lived one
+        (e.g. when the generator is used standalone from the CLI)
+        """
+        if self.http_client is not None:
+            yield self.http_client
+        else:
+            async with httpx.AsyncClient() as client:
+                yield client
+        
     async def get_available_voices(self) -> Dict[str, Any]:
         """
         Retrieve list of available voices from ElevenLabs
@@ -55,7 +75,7 @@ class AudioGenerator:
             "Content-Type": "application/json"
         }
         
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             try:
                 response = await client.get(url, headers=headers)
                 response.raise_for_status()
@@ -64,26 +84,16 @@ class AudioGenerator:
                 logger.error(f"Error fetching voices: {e}", exc_info=True)
                 raise
     
-    async def generate_audio(
+    def _build_tts_request(
         self,
         text: str,
-        voice_id: Optional[str] = None,
-        model_id: str = "eleven_multilingual_v2",
-        voice_settings: Optional[Dict[str, Any]] = None,
-        output_format: str = "mp3_44100_128"
-    ) -> bytes:
+        voice_id: Optional[str],
+        model_id: str,
+        voice_settings: Optional[Dict[str, Any]],
+        output_format: str
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         """
-        Generate audio from text using ElevenLabs TTS API
-        
-        Args:
-            text: The text to convert to speech
-            voice_id: ID of the voice to use (defaults to default_voice_id)
-            model_id: Model to use for synthesis
-            voice_settings: Custom voice settings (stability, similarity_boost, etc.)
-            output_format: Audio output format
-            
-        Returns:
-            Audio data as bytes
+        Validate input and build the voice ID, headers and payload for a TTS request
         """
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
@@ -91,12 +101,14 @@ class AudioGenerator:
         # Use default voice if none specified
         if not voice_id:
             voice_id = self.default_voice_id
+        elif not VOICE_ID_PATTERN.fullmatch(voice_id):
+            # The ID is interpolated into the URL path sent with our API key
+            raise ValueError("Invalid voice ID")
             
         # Use default settings if none specified
         if not voice_settings:
             voice_settings = self.default_voice_settings
         
-        url = f"{self.base_url}/text-to-speech/{voice_id}"
         headers = {
             "xi-api-key": self.api_key,
             "Content-Type": "application/json"
@@ -108,13 +120,38 @@ class AudioGenerator:
             "voice_settings": voice_settings,
             "output_format": output_format
         }
+        return voice_id, headers, payload
+    
+    async def generate_audio(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        model_id: str = "eleven_multilingual_v2",
+        voice_settings: Optional[Dict[str, Any]] = None,
+        output_format: str = "mp3_44100_128"
+    ) -> bytes:
+        """
+        Generate audio from text using ElevenLabs TTS API
+        
+        Args:
+            text: The text to convert to speech
+            voice_id: ID of the voice to use (defaults to default_voice_id)
+            model_id: Model to use for synthesis
+            voice_settings: Custom voice settings (stability, similarity_boost, etc.)
+            output_format: Audio output format
+            
+        Returns:
+            Audio data as bytes
+        """
+        voice_id, headers, payload = self._build_tts_request(text, voice_id, model_id, voice_settings, output_format)
+        url = f"{self.base_url}/text-to-speech/{voice_id}"
         
         logger.info(f"Generating audio for text: '{text[:50]}{'...' if len(text) > 50 else ''}'")
-        logger.debug(f"Using voice ID: {voice_id}")
+        logger.debug("Using voice ID: %s", voice_id)
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client() as client:
             try:
-                response = await client.post(url, headers=headers, json=payload)
+                response = await client.post(url, headers=headers, json=payload, timeout=30.0)
                 response.raise_for_status()
                 
                 audio_data = response.content
@@ -131,6 +168,48 @@ class AudioGenerator:
                 logger.error(f"Unexpected error: {e}", exc_info=True)
                 raise
     
+    async def open_audio_stream(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        model_id: str = "eleven_multilingual_v2",
+        voice_settings: Optional[Dict[str, Any]] = None,
+        output_format: str = "mp3_44100_128"
+    ) -> httpx.Response:
+        """
+        Start a streaming TTS request against ElevenLabs
+        
+        Args:
+            text: The text to convert to speech
+            voice_id: ID of the voice to use
+            model_id: Model to use for synthesis
+            voice_settings: Custom voice settings
+            output_format: Audio output format
+            
+        Returns:
+            The open upstream response, returned once headers arrive. The caller
+            must consume it with aiter_bytes() and close it with aclose().
+        """
+        if self.http_client is None:
+            raise RuntimeError("Streaming audio requires the shared http_client set by the app lifespan")
+        
+        voice_id, headers, payload = self._build_tts_request(text, voice_id, model_id, voice_settings, output_format)
+        url = f"{self.base_url}/text-to-speech/{voice_id}/stream"
+        
+        logger.info(f"Streaming audio for text: '{text[:50]}{'...' if len(text) > 50 else ''}'")
+        logger.debug("Using voice ID: %s", voice_id)
+        
+        request = self.http_client.build_request(
+            "POST", url, headers=headers, json=payload, params={"output_format": output_format}, timeout=60.0
+        )
+        response = await self.http_client.send(request, stream=True)
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+            logger.error(f"HTTP Error {response.status_code}: {response.text}")
+            response.raise_for_status()
+        return response
+    
     async def generate_audio_base64(
         self,
         text: str,
@@ -161,7 +240,7 @@ class AudioGenerator:
         )
         
         base64_audio = base64.b64encode(audio_data).decode('utf-8')
-        logger.debug(f"Audio converted to base64 ({len(base64_audio)} characters)")
+        logger.debug("Audio converted to base64 (%s characters)", len(base64_audio))
         return base64_audio
     
     async def save_audio_file(
@@ -6,10 +6,10 @@ Generates comic art for panels based on reference sketches from users
 import os
 import sys
 import base64
-import tempfile
-import io
+import asyncio
 import logging
 import google.generativeai as genai
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 from io import BytesIO
 from dotenv import load_dotenv
@@ -20,6 +20,36 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of image generations in flight against Gemini at once
+MAX_CONCURRENT_GENERATIONS = 5
+_generation_semaphore = asyncio.Semaphore(MAX_CONCURRENT_GENERATIONS)
+
+# Input images are downscaled to this longest edge before being sent to Gemini
+MAX_INPUT_EDGE = 1024
+
+def shrink_image(image_bytes: bytes, max_edge: int = MAX_INPUT_EDGE) -> bytes:
+    """
+    Downscale an image so its longest edge is at most max_edge (Lanczos) and
+    re-encode it as JPEG. Small JPEGs are returned unchanged.
+    """
+    img = Image.open(BytesIO(image_bytes))
+    if img.format == 'JPEG' and max(img.size) <= max_edge:
+        return image_bytes
+    
+    img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Flatten transparent sketch backgrounds onto white rather than black
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    
+    buf = BytesIO()
+    img.save(buf, format='JPEG', quality=85, optimize=True)
+    return buf.getvalue()
+
 class ComicArtGenerator:
     def __init__(self):
         """Initialize the Comic Art Generator"""
@@ -36,48 +66,57 @@ class ComicArtGenerator:
         
         Args:
             text_prompt (str): Text description for the comic panel
-            reference_image_data (str): Base64 encoded reference sketch image data (optional)
-            context_image_data (str): Base64 encoded context image data (optional)
+            reference_image_data (str | bytes): Base64 encoded or raw reference sketch image data (optional)
+            context_image_data (str | bytes): Base64 encoded or raw context image data (optional)
             is_thumbnail (bool): Whether this is a thumbnail/cover (portrait 3:4) or panel (landscape 4:3)
             
         Returns:
             PIL.Image: Generated comic art image
         """
         # Process reference image if provided
-        reference_image_path = None
+        reference_image_bytes = None
         if reference_image_data:
             try:
-                # Decode base64 image
-                image_data = base64.b64decode(reference_image_data)
-                
-                # Create temporary file for processing (will be cleaned up)
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_file:
-                    temp_file.write(image_data)
-                    reference_image_path = temp_file.name
-                
-                logger.debug("Processing reference image in memory...")
-                
+                if isinstance(reference_image_data, str):
+                    reference_image_data = base64.b64decode(reference_image_data)
+                reference_image_bytes = shrink_image(reference_image_data)
+                logger.debug("Reference image size: %s bytes", len(reference_image_bytes))
             except Exception as e:
                 logger.error(f"Error processing reference image: {e}", exc_info=True)
-                reference_image_path = None
+                reference_image_bytes = None
         
-        try:
-            # Generate the comic art
-            image = self._generate_art(text_prompt, reference_image_path, context_image_data, is_thumbnail)
-            return image
-        finally:
-            # Clean up temporary reference image file
-            if reference_image_path and os.path.exists(reference_image_path):
-                os.unlink(reference_image_path)
-                logger.debug("Cleaned up temporary reference image file")
+        # Generate the comic art
+        return self._generate_art(text_prompt, reference_image_bytes, context_image_data, is_thumbnail)
     
-    def _generate_art(self, text_prompt, reference_image_path=None, context_image_data=None, is_thumbnail=False):
+    async def generate_comic_art_async(self, text_prompt, reference_image_data=None, context_image_data=None, is_thumbnail=False):
+        """
+        Run generate_comic_art in the threadpool so the blocking Gemini call doesn't
+        stall the event loop; concurrent generations are capped by a shared semaphore
+        """
+        async with _generation_semaphore:
+            return await run_in_threadpool(
+                self.generate_comic_art, text_prompt, reference_image_data, context_image_data, is_thumbnail
+            )
+    
+    def _load_context_image(self, context_image_data) -> bytes:
+        """Normalize context image data (BytesIO, raw bytes or base64) to downscaled JPEG bytes"""
+        if hasattr(context_image_data, 'read'):
+            # It's already a BytesIO object
+            context_img_bytes = context_image_data.getvalue()
+        elif isinstance(context_image_data, (bytes, bytearray)):
+            context_img_bytes = bytes(context_image_data)
+        else:
+            # It's base64 encoded string data
+            context_img_bytes = base64.b64decode(context_image_data)
+        return shrink_image(context_img_bytes)
+    
+    def _generate_art(self, text_prompt, reference_image_bytes=None, context_image_data=None, is_thumbnail=False):
         """
         Internal method to generate comic art
         """
         # Determine if we have context (subsequent panel generation)
         has_context = context_image_data is not None
-        logger.debug(f"ComicArtGenerator: has_context={has_context}, is_thumbnail={is_thumbnail}, context_size={len(context_image_data) if context_image_data else 0}")
+        logger.debug("ComicArtGenerator: has_context=%s, is_thumbnail=%s, context_size=%s", has_context, is_thumbnail, len(context_image_data) if context_image_data else 0)
         
         if has_context:
             logger.info("Using context-aware generation with previous panel image")
@@ -119,65 +158,31 @@ class ComicArtGenerator:
                 "Ideal dimensions are 800x600 pixels or similar 4:3 proportions."
             )
         
-        if reference_image_path:
-            # Load image from file
-            try:
-                reference_image = Image.open(reference_image_path)
-                logger.debug(f"Loaded reference image: {reference_image.size} pixels")
-                
-                # Convert to bytes for API
-                img_buffer = BytesIO()
-                reference_image.save(img_buffer, format='PNG')
-                img_bytes = img_buffer.getvalue()
-                logger.debug(f"Reference image size: {len(img_bytes)} bytes")
-
-                # Create multimodal content with image and text
-                # Convert image bytes to PIL Image for the API
-                img = Image.open(io.BytesIO(img_bytes))
+        if reference_image_bytes:
+            # Create multimodal content with the (downscaled) sketch and text
+            prompt_parts = [
+                {'mime_type': 'image/jpeg', 'data': reference_image_bytes},
+                f"{system_prompt}\n\nText prompt: {text_prompt}"
+            ]
 
-                # Create the prompt with image
-                prompt_parts = [
-                    img,
-                    f"{system_prompt}\n\nText prompt: {text_prompt}"
-                ]
-
-                # Add context image if available
-                if has_context:
-                    try:
-                        # Check if context_image_data is already a BytesIO object or needs base64 decoding
-                        if hasattr(context_image_data, 'read'):
-                            # It's already a BytesIO object
-                            context_img = Image.open(context_image_data)
-                            context_img_bytes = context_image_data.getvalue()
-                        else:
-                            # It's base64 encoded string data
-                            context_img_bytes = base64.b64decode(context_image_data)
-                            context_img = Image.open(io.BytesIO(context_img_bytes))
-                        prompt_parts.insert(0, context_img)
-                        logger.debug(f"Added context image to generation (size: {len(context_img_bytes)} bytes)")
-                    except Exception as e:
-                        logger.warning(f"Error processing context image: {e}", exc_info=True)
-                
-                logger.info("Generating comic art with reference sketch...")
-                
-            except Exception as e:
-                raise Exception(f"Error processing reference image: {e}")
+            # Add context image if available
+            if has_context:
+                try:
+                    context_img_bytes = self._load_context_image(context_image_data)
+                    prompt_parts.insert(0, {'mime_type': 'image/jpeg', 'data': context_img_bytes})
+                    logger.debug("Added context image to generation (size: %s bytes)", len(context_img_bytes))
+                except Exception as e:
+                    logger.warning(f"Error processing context image: {e}", exc_info=True)
+            
+            logger.info("Generating comic art with reference sketch...")
         else:
             # Text-only generation or context-only generation
             if has_context:
                 # Context-only generation (no reference sketch)
                 try:
-                    # Check if context_image_data is already a BytesIO object or needs base64 decoding
-                    if hasattr(context_image_data, 'read'):
-                        # It's already a BytesIO object
-                        context_img = Image.open(context_image_data)
-                        context_img_bytes = context_image_data.getvalue()
-                    else:
-                        # It's base64 encoded string data
-                        context_img_bytes = base64.b64decode(context_image_data)
-                        context_img = Image.open(io.BytesIO(context_img_bytes))
+                    context_img_bytes = self._load_context_image(context_image_data)
                     prompt_parts = [
-                        context_img,
+                        {'mime_type': 'image/jpeg', 'data': context_img_bytes},
                         f"{system_prompt}\n\nText prompt: {text_prompt}"
                     ]
                     logger.info(f"Generating comic art with context image only (size: {len(context_img_bytes)} bytes)...")
@@ -210,12 +215,25 @@ class ComicArtGenerator:
             logger.error(f"Error in ComicArtGenerator._generate_art: {e}", exc_info=True)
             raise Exception(f"Error generating comic art: {e}")
     
-    def image_to_base64(self, image: Image.Image) -> str:
-        """Convert PIL Image to base64 string"""
+    def _encode_image(self, image: Image.Image, fmt: str, quality: int) -> BytesIO:
+        """Encode PIL Image into an in-memory buffer"""
         img_buffer = BytesIO()
-        image.save(img_buffer, format='PNG')
-        img_bytes = img_buffer.getvalue()
-        return base64.b64encode(img_bytes).decode('utf-8')
+        if fmt.upper() == 'JPEG':
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.save(img_buffer, format='JPEG', quality=quality, optimize=False, progressive=False)
+        else:
+            image.save(img_buffer, format=fmt)
+        return img_buffer
+    
+    def image_to_bytes(self, image: Image.Image, fmt: str = 'PNG', quality: int = 88) -> bytes:
+        """Encode PIL Image as PNG (lossless, for storage) or JPEG"""
+        return self._encode_image(image, fmt, quality).getvalue()
+    
+    def image_to_base64(self, image: Image.Image, fmt: str = 'JPEG', quality: int = 88) -> str:
+        """Convert PIL Image to base64 string (JPEG by default, much cheaper to encode than PNG)"""
+        img_buffer = self._encode_image(image, fmt, quality)
+        return base64.b64encode(img_buffer.getbuffer()).decode('ascii')
     
     def save_image(self, image, filename):
         """
@@ -258,7 +276,11 @@ def main():
             reference_image_path = None
         
         # Generate comic art
-        image = generator.generate_comic_art(text_prompt, reference_image_path)
+        reference_image_bytes = None
+        if reference_image_path:
+            with open(reference_image_path, 'rb') as f:
+                reference_image_bytes = f.read()
+        image = generator.generate_comic_art(text_prompt, reference_image_bytes)
         
         # Save the generated image
         safe_prompt = "".join(c for c in text_prompt if c.isalnum() or c in (' ', '-', '_')).rstrip()
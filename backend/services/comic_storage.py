@@ -2,10 +2,12 @@
 import os
 import base64
 import math
+import asyncio
 import logging
 from io import BytesIO
+from fastapi.concurrency import run_in_threadpool
 from supabase import create_client, Client
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
 from PIL import Image
 
@@ -13,6 +15,19 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+def _decode_base64_sync(data: str) -> bytes:
+    """Strip an optional data URL prefix, encode to ASCII bytes and decode"""
+    if data.startswith('data:'):
+        data = data.split(',', 1)[1]
+    return base64.b64decode(data.encode('ascii'))
+
+async def decode_base64_data(data: str) -> bytes:
+    """
+    Decode base64 (raw or data URL) off the event loop
+    The prefix strip and ASCII encode each copy the payload, so they run in the threadpool too
+    """
+    return await run_in_threadpool(_decode_base64_sync, data)
+
 class ComicStorageService:
     def __init__(self):
         self.supabase_url = os.getenv('SUPABASE_URL')
@@ -27,90 +42,26 @@ class ComicStorageService:
         """
         try:
             # 1. Create comic record in database
-            comic_response = self.supabase.table('comics').insert({
+            comic_response = await run_in_threadpool(self.supabase.table('comics').insert({
                 'title': comic_title,
                 'user_id': user_id,
                 'is_public': is_public
-            }).execute()
+            }).execute)
             
             comic_id = comic_response.data[0]['id']
             
-            # 2. Save each panel
-            panel_images: List[Image.Image] = []
-            base_panel_size = None
-            for panel_data in panels_data:
-                panel_id = panel_data['id']
-                # Handle both old and new schema
-                image_data = panel_data.get('image_data') or panel_data.get('largeCanvasData')
-                
-                if image_data:
-                    # Upload to Supabase Storage
-                    storage_path = f"users/{user_id}/comics/{comic_id}/panel_{panel_id}.png"
-                    
-                    # Convert base64 to bytes
-                    # Handle both data URL format and raw base64
-                    if image_data.startswith('data:'):
-                        image_bytes = base64.b64decode(image_data.split(',')[1])
-                    else:
-                        image_bytes = base64.b64decode(image_data)
-                    
-                    # Upload to storage
-                    self.supabase.storage.from_(self.bucket_name).upload(
-                        path=storage_path,
-                        file=image_bytes,
-                        file_options={"content-type": "image/png"}
-                    )
-                    
-                    # Get public URL
-                    public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(storage_path)
-
-                    # Handle audio if available
-                    audio_url = None
-                    narration = panel_data.get('narration')
-                    audio_data = panel_data.get('audio_data')
-
-                    if audio_data:
-                        audio_storage_path = f"users/{user_id}/comics/{comic_id}/audio/panel_{panel_id}.mp3"
-
-                        try:
-                            # Convert base64 to bytes
-                            audio_bytes = base64.b64decode(audio_data)
-
-                            # Upload audio to storage with upsert to allow overwriting
-                            self.supabase.storage.from_(self.bucket_name).upload(
-                                path=audio_storage_path,
-                                file=audio_bytes,
-                                file_options={"content-type": "audio/mpeg", "upsert": "true"}
-                            )
-
-                            # Get public URL for audio
-                            audio_url = self.supabase.storage.from_(self.bucket_name).get_public_url(audio_storage_path)
-                            logger.info(f"Audio uploaded for panel {panel_id}: {audio_url}")
-                        except Exception as audio_err:
-                            logger.warning(f"Failed to upload audio for panel {panel_id}: {audio_err}", exc_info=True)
-
-                    # Save panel metadata to database
-                    self.supabase.table('comic_panels').insert({
-                        'comic_id': comic_id,
-                        'panel_number': panel_id,
-                        'storage_path': storage_path,
-                        'public_url': public_url,
-                        'file_size': len(image_bytes),
-                        'narration': narration,
-                        'audio_url': audio_url
-                    }).execute()
-
-                    # Keep PIL image for composite
-                    try:
-                        img = Image.open(BytesIO(image_bytes)).convert("RGB")
-                        if base_panel_size is None:
-                            base_panel_size = img.size
-                        # Normalize size to the first panel's size
-                        if img.size != base_panel_size:
-                            img = img.resize(base_panel_size)
-                        panel_images.append((panel_id, img))
-                    except Exception as pil_err:
-                        logger.warning(f"Failed to open panel {panel_id} for composite: {pil_err}", exc_info=True)
+            # 2. Save all panels concurrently (decode + uploads + row insert per panel).
+            # TaskGroup cancels the remaining panels as soon as one fails.
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    panel_tasks = [
+                        tg.create_task(self._save_comic_panel(user_id, comic_id, panel_data))
+                        for panel_data in panels_data
+                    ]
+            except ExceptionGroup as eg:
+                # Surface the first failure, as the old sequential loop did
+                raise eg.exceptions[0]
+            saved_panels = [task.result() for task in panel_tasks]
             
             # 3. Create thumbnail/composite image
             composite_public_url: Optional[str] = None
@@ -120,33 +71,19 @@ class ComicStorageService:
             if thumbnail_data:
                 logger.info("Using custom thumbnail")
                 # Handle both data URL format and raw base64
-                if thumbnail_data.startswith('data:'):
-                    thumbnail_bytes = base64.b64decode(thumbnail_data.split(',')[1])
-                else:
-                    thumbnail_bytes = base64.b64decode(thumbnail_data)
-            elif panel_images:
+                thumbnail_bytes = await decode_base64_data(thumbnail_data)
+            elif any(saved_panels):
                 logger.info("Creating composite thumbnail from panels")
-                # Sort by panel number to place in order
-                panel_images.sort(key=lambda t: t[0])
-                _, first_img = panel_images[0]
-                w, h = first_img.size
-                cols = 2
-                rows = math.ceil(len(panel_images) / cols)
-                composite = Image.new("RGB", (w * cols, h * rows), color=(255, 255, 255))
-                for idx, (_pid, img) in enumerate(panel_images):
-                    x = (idx % cols) * w
-                    y = (idx // cols) * h
-                    composite.paste(img, (x, y))
-
-                # Save composite to bytes
-                buf = BytesIO()
-                composite.save(buf, format="PNG")
-                thumbnail_bytes = buf.getvalue()
+                # PIL decode/resize/encode is CPU-bound, keep it off the event loop
+                thumbnail_bytes = await run_in_threadpool(
+                    self._build_composite, [saved for saved in saved_panels if saved is not None]
+                )
 
             if thumbnail_bytes:
                 # Upload thumbnail/composite
                 composite_path = f"users/{user_id}/comics/{comic_id}/thumbnail.png"
-                self.supabase.storage.from_(self.bucket_name).upload(
+                await run_in_threadpool(
+                    self.supabase.storage.from_(self.bucket_name).upload,
                     path=composite_path,
                     file=thumbnail_bytes,
                     file_options={"content-type": "image/png", "upsert": "true"}
@@ -154,13 +91,13 @@ class ComicStorageService:
                 composite_public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(composite_path)
 
                 # Store thumbnail as a special panel_number 0 record
-                self.supabase.table('comic_panels').insert({
+                await run_in_threadpool(self.supabase.table('comic_panels').insert({
                     'comic_id': comic_id,
                     'panel_number': 0,
                     'storage_path': composite_path,
                     'public_url': composite_public_url,
                     'file_size': len(thumbnail_bytes)
-                }).execute()
+                }).execute)
             
             return {"comic_id": comic_id, "composite_public_url": composite_public_url}
             
@@ -168,22 +105,135 @@ class ComicStorageService:
             logger.error(f"Error saving comic: {e}", exc_info=True)
             raise
     
+    async def _save_comic_panel(self, user_id: str, comic_id: str, panel_data: dict) -> Optional[Tuple[int, bytes]]:
+        """
+        Upload one panel (and its audio, if any) and insert its database row
+        Returns (panel_id, image_bytes), or None if the panel has no image
+        """
+        panel_id = panel_data['id']
+        # Handle both old and new schema
+        image_data = panel_data.get('image_data') or panel_data.get('largeCanvasData')
+        
+        if not image_data:
+            return None
+        
+        # Upload to Supabase Storage
+        storage_path = f"users/{user_id}/comics/{comic_id}/panel_{panel_id}.png"
+        
+        # Convert base64 to bytes (handles both data URL format and raw base64)
+        image_bytes = await decode_base64_data(image_data)
+        
+        # Upload to storage
+        await run_in_threadpool(
+            self.supabase.storage.from_(self.bucket_name).upload,
+            path=storage_path,
+            file=image_bytes,
+            file_options={"content-type": "image/png"}
+        )
+        
+        # Get public URL
+        public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(storage_path)
+
+        # Handle audio if available
+        audio_url = None
+        narration = panel_data.get('narration')
+        audio_data = panel_data.get('audio_data')
+
+        if audio_data:
+            audio_storage_path = f"users/{user_id}/comics/{comic_id}/audio/panel_{panel_id}.mp3"
+
+            try:
+                # Server-generated audio is already raw bytes; only client payloads are base64
+                if isinstance(audio_data, bytes):
+                    audio_bytes = audio_data
+                else:
+                    audio_bytes = await decode_base64_data(audio_data)
+
+                # Upload audio to storage with upsert to allow overwriting
+                await run_in_threadpool(
+                    self.supabase.storage.from_(self.bucket_name).upload,
+                    path=audio_storage_path,
+                    file=audio_bytes,
+                    file_options={"content-type": "audio/mpeg", "upsert": "true"}
+                )
+
+                # Get public URL for audio
+                audio_url = self.supabase.storage.from_(self.bucket_name).get_public_url(audio_storage_path)
+                logger.info(f"Audio uploaded for panel {panel_id}: {audio_url}")
+            except Exception as audio_err:
+                logger.warning(f"Failed to upload audio for panel {panel_id}: {audio_err}", exc_info=True)
+
+        # Save panel metadata to database
+        await run_in_threadpool(self.supabase.table('comic_panels').insert({
+            'comic_id': comic_id,
+            'panel_number': panel_id,
+            'storage_path': storage_path,
+            'public_url': public_url,
+            'file_size': len(image_bytes),
+            'narration': narration,
+            'audio_url': audio_url
+        }).execute)
+        
+        return panel_id, image_bytes
+    
+    def _build_composite(self, saved_panels: List[Tuple[int, bytes]]) -> Optional[bytes]:
+        """
+        Tile the panels into a 2-column composite PNG
+        Panels are normalized to the first panel's size
+        """
+        panel_images: List[Tuple[int, Image.Image]] = []
+        base_panel_size = None
+        for panel_id, image_bytes in saved_panels:
+            try:
+                img = Image.open(BytesIO(image_bytes))
+                # convert() always copies, so only call it when the mode actually differs
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                if base_panel_size is None:
+                    base_panel_size = img.size
+                # Normalize size to the first panel's size
+                if img.size != base_panel_size:
+                    img = img.resize(base_panel_size)
+                panel_images.append((panel_id, img))
+            except Exception as pil_err:
+                logger.warning(f"Failed to open panel {panel_id} for composite: {pil_err}", exc_info=True)
+        
+        if not panel_images:
+            return None
+        
+        # Sort by panel number to place in order
+        panel_images.sort(key=lambda t: t[0])
+        _, first_img = panel_images[0]
+        w, h = first_img.size
+        cols = 2
+        rows = math.ceil(len(panel_images) / cols)
+        composite = Image.new("RGB", (w * cols, h * rows), color=(255, 255, 255))
+        for idx, (_pid, img) in enumerate(panel_images):
+            x = (idx % cols) * w
+            y = (idx // cols) * h
+            composite.paste(img, (x, y))
+
+        # Save composite to bytes
+        buf = BytesIO()
+        composite.save(buf, format="PNG")
+        return buf.getvalue()
+    
     async def get_user_comics(self, user_id: str) -> List[dict]:
-        """Get all comics for a user"""
-        response = self.supabase.table('comics').select("""
+        """Get all comics for a user (comics and panels in one embedded query)"""
+        response = await run_in_threadpool(self.supabase.table('comics').select("""
             id, title, is_public, created_at, updated_at,
             comic_panels(id, panel_number, public_url, storage_path, file_size, created_at, narration, audio_url)
-        """).eq('user_id', user_id).order('created_at', desc=True).execute()
+        """).eq('user_id', user_id).order('created_at', desc=True).execute)
         
         return response.data
     
     async def get_public_comics(self) -> List[dict]:
         """Get all public comics from all users with user display names"""
         # First get the comics
-        comics_response = self.supabase.table('comics').select("""
+        comics_response = await run_in_threadpool(self.supabase.table('comics').select("""
             id, title, user_id, is_public, created_at, updated_at,
             comic_panels(id, panel_number, public_url, storage_path, file_size, created_at, narration, audio_url)
-        """).eq('is_public', True).order('created_at', desc=True).execute()
+        """).eq('is_public', True).order('created_at', desc=True).execute)
         
         comics = comics_response.data
         
@@ -193,7 +243,7 @@ class ComicStorageService:
         # Fetch user names
         user_names = {}
         if user_ids:
-            profiles_response = self.supabase.table('user_profiles').select('user_id, name').in_('user_id', user_ids).execute()
+            profiles_response = await run_in_threadpool(self.supabase.table('user_profiles').select('user_id, name').in_('user_id', user_ids).execute)
             user_names = {profile['user_id']: profile.get('name') for profile in profiles_response.data}
         
         # Add user names to comics
@@ -206,16 +256,16 @@ class ComicStorageService:
     
     async def get_all_comics(self) -> List[dict]:
         """Get all comics from all users for exploration"""
-        response = self.supabase.table('comics').select("""
+        response = await run_in_threadpool(self.supabase.table('comics').select("""
             id, title, created_at, updated_at,
             comic_panels(id, panel_number, public_url)
-        """).order('created_at', desc=True).execute()
+        """).order('created_at', desc=True).execute)
         
         return response.data
     
     async def get_comic_panels(self, comic_id: str) -> List[dict]:
         """Get all panels for a specific comic"""
-        response = self.supabase.table('comic_panels').select("*").eq('comic_id', comic_id).order('panel_number').execute()
+        response = await run_in_threadpool(self.supabase.table('comic_panels').select("*").eq('comic_id', comic_id).order('panel_number').execute)
         return response.data
     
     async def save_panel(self, user_id: str, comic_title: str, panel_id: int, image_data: str) -> dict:
@@ -225,18 +275,18 @@ class ComicStorageService:
         """
         try:
             # 1. Check if comic already exists, create if not
-            existing_comic = self.supabase.table('comics').select('id').eq('title', comic_title).eq('user_id', user_id).execute()
+            existing_comic = await run_in_threadpool(self.supabase.table('comics').select('id').eq('title', comic_title).eq('user_id', user_id).execute)
             
             if existing_comic.data:
                 comic_id = existing_comic.data[0]['id']
                 logger.info(f"Using existing comic ID: {comic_id}")
             else:
                 # Create new comic record
-                comic_response = self.supabase.table('comics').insert({
+                comic_response = await run_in_threadpool(self.supabase.table('comics').insert({
                     'title': comic_title,
                     'user_id': user_id,
                     'is_public': False
-                }).execute()
+                }).execute)
                 comic_id = comic_response.data[0]['id']
                 logger.info(f"Created new comic with ID: {comic_id}")
             
@@ -244,22 +294,23 @@ class ComicStorageService:
             storage_path = f"users/{user_id}/comics/{comic_id}/panel_{panel_id}.png"
             
             # Convert base64 to bytes
-            image_bytes = base64.b64decode(image_data)
+            image_bytes = await decode_base64_data(image_data)
             
             # Upload to storage
-            upload_result = self.supabase.storage.from_(self.bucket_name).upload(
+            upload_result = await run_in_threadpool(
+                self.supabase.storage.from_(self.bucket_name).upload,
                 path=storage_path,
                 file=image_bytes,
                 file_options={"content-type": "image/png", "upsert": "true"}
             )
             
-            logger.debug(f"Storage upload result: {upload_result}")
+            logger.debug("Storage upload result: %s", upload_result)
             
             # Get public URL
             public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(storage_path)
             
             # 3. Save/update panel metadata in database
-            existing_panel = self.supabase.table('comic_panels').select('id').eq('comic_id', comic_id).eq('panel_number', panel_id).execute()
+            existing_panel = await run_in_threadpool(self.supabase.table('comic_panels').select('id').eq('comic_id', comic_id).eq('panel_number', panel_id).execute)
             
             panel_data = {
                 'comic_id': comic_id,
@@ -271,11 +322,11 @@ class ComicStorageService:
             
             if existing_panel.data:
                 # Update existing panel
-                update_result = self.supabase.table('comic_panels').update(panel_data).eq('id', existing_panel.data[0]['id']).execute()
+                update_result = await run_in_threadpool(self.supabase.table('comic_panels').update(panel_data).eq('id', existing_panel.data[0]['id']).execute)
                 logger.info(f"Updated panel {panel_id} in database")
             else:
                 # Insert new panel
-                insert_result = self.supabase.table('comic_panels').insert(panel_data).execute()
+                insert_result = await run_in_threadpool(self.supabase.table('comic_panels').insert(panel_data).execute)
                 logger.info(f"Saved panel {panel_id} to database")
             
             return {
@@ -294,7 +345,7 @@ class ComicStorageService:
         """Delete a comic and all its panels"""
         try:
             # First, check if the comic exists and belongs to the user
-            comic_check = self.supabase.table('comics').select('id, title').eq('id', comic_id).eq('user_id', user_id).execute()
+            comic_check = await run_in_threadpool(self.supabase.table('comics').select('id, title').eq('id', comic_id).eq('user_id', user_id).execute)
             
             if not comic_check.data:
                 return False
@@ -304,10 +355,10 @@ class ComicStorageService:
             
             # Delete files from storage
             for panel in panels:
-                self.supabase.storage.from_(self.bucket_name).remove([panel['storage_path']])
+                await run_in_threadpool(self.supabase.storage.from_(self.bucket_name).remove, [panel['storage_path']])
             
             # Delete from database (cascade will handle panels)
-            self.supabase.table('comics').delete().eq('id', comic_id).eq('user_id', user_id).execute()
+            await run_in_threadpool(self.supabase.table('comics').delete().eq('id', comic_id).eq('user_id', user_id).execute)
             
             return True
         except Exception as e:
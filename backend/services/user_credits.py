@@ -5,6 +5,7 @@ Handles credit management for users including adding, deducting, and checking cr
 
 import logging
 from typing import Optional
+from fastapi.concurrency import run_in_threadpool
 from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
@@ -27,7 +28,7 @@ class UserCreditsService:
     async def get_user_credits(self, user_id: str) -> int:
         """Get the current credit balance for a user"""
         try:
-            result = self.supabase.rpc('get_user_credits', {'user_uuid': user_id}).execute()
+            result = await run_in_threadpool(self.supabase.rpc('get_user_credits', {'user_uuid': user_id}).execute)
             
             # Handle the result properly - RPC function returns integer directly
             if result.data is not None:
@@ -48,10 +49,10 @@ class UserCreditsService:
     async def add_credits(self, user_id: str, credits_to_add: int) -> int:
         """Add credits to a user's account and return the new balance"""
         try:
-            result = self.supabase.rpc('add_user_credits', {
+            result = await run_in_threadpool(self.supabase.rpc('add_user_credits', {
                 'user_uuid': user_id,
                 'credits_to_add': credits_to_add
-            }).execute()
+            }).execute)
             
             new_credits = result.data if result.data is not None else 0
             logger.info(f"Added {credits_to_add} credits to user {user_id}. New balance: {new_credits}")
@@ -63,10 +64,10 @@ class UserCreditsService:
     async def deduct_credits(self, user_id: str, credits_to_deduct: int) -> int:
         """Deduct credits from a user's account and return the new balance"""
         try:
-            result = self.supabase.rpc('deduct_user_credits', {
+            result = await run_in_threadpool(self.supabase.rpc('deduct_user_credits', {
                 'user_uuid': user_id,
                 'credits_to_deduct': credits_to_deduct
-            }).execute()
+            }).execute)
             
             new_credits = result.data if result.data is not None else 0
             logger.info(f"Deducted {credits_to_deduct} credits from user {user_id}. New balance: {new_credits}")
@@ -78,10 +79,10 @@ class UserCreditsService:
     async def has_sufficient_credits(self, user_id: str, required_credits: int) -> bool:
         """Check if a user has sufficient credits for an operation"""
         try:
-            result = self.supabase.rpc('has_sufficient_credits', {
+            result = await run_in_threadpool(self.supabase.rpc('has_sufficient_credits', {
                 'user_uuid': user_id,
                 'required_credits': required_credits
-            }).execute()
+            }).execute)
             
             has_credits = result.data if result.data is not None else False
             return has_credits
@@ -92,7 +93,7 @@ class UserCreditsService:
     async def get_user_name(self, user_id: str) -> Optional[str]:
         """Get the user's name from their profile"""
         try:
-            result = self.supabase.table('user_profiles').select('name').eq('user_id', user_id).execute()
+            result = await run_in_threadpool(self.supabase.table('user_profiles').select('name').eq('user_id', user_id).execute)
             
             if result.data and len(result.data) > 0:
                 name = result.data[0].get('name')
@@ -111,9 +112,9 @@ class UserCreditsService:
             await self.ensure_user_profile(user_id)
             
             # Update the name
-            result = self.supabase.table('user_profiles').update({
+            result = await run_in_threadpool(self.supabase.table('user_profiles').update({
                 'name': name
-            }).eq('user_id', user_id).execute()
+            }).eq('user_id', user_id).execute)
             
             logger.info(f"Updated name for user {user_id} to: {name}")
             return True
@@ -125,14 +126,14 @@ class UserCreditsService:
         """Ensure a user has a profile record (creates one if it doesn't exist)"""
         try:
             # Try to get existing profile
-            result = self.supabase.table('user_profiles').select('id').eq('user_id', user_id).execute()
+            result = await run_in_threadpool(self.supabase.table('user_profiles').select('id').eq('user_id', user_id).execute)
             
             if not result.data:
                 # Create new profile with 0 credits
-                self.supabase.table('user_profiles').insert({
+                await run_in_threadpool(self.supabase.table('user_profiles').insert({
                     'user_id': user_id,
                     'credits': 0
-                }).execute()
+                }).execute)
                 logger.info(f"Created new profile for user {user_id}")
                 return True
             else:
@@ -149,9 +150,9 @@ class UserCreditsService:
             await self.ensure_user_profile(user_id)
             
             # Update the credits directly
-            result = self.supabase.table('user_profiles').update({
+            result = await run_in_threadpool(self.supabase.table('user_profiles').update({
                 'credits': credits
-            }).eq('user_id', user_id).execute()
+            }).eq('user_id', user_id).execute)
             
             logger.info(f"Set credits for user {user_id} to: {credits}")
             return credits
@@ -536,7 +536,7 @@ export default function CreatePage() {
             updatePanel(panelId, { prompt: textPrompt });
           }
         };
-        img.src = `data:image/png;base64,${result.image_data}`;
+        img.src = `data:${result.mime_type || 'image/png'};base64,${result.image_data}`;
       } else {
         setError(result.error || 'Error generating comic art');
       }
@@ -27,6 +27,26 @@ export const API_URL = API_CONFIG.BASE_URL;
 // Simple cache for API responses
 const apiCache = new Map<string, { data: unknown; timestamp: number }>();
 const CACHE_DURATION = 5000; // 5 seconds cache
+const CACHE_MAX_ENTRIES = 100; // Oldest entries are evicted beyond this
+
+// Store a response, dropping expired entries and evicting the oldest ones so the cache stays bounded
+const setCachedResponse = (key: string, data: unknown, now: number) => {
+  for (const [cachedKey, entry] of apiCache) {
+    if (now - entry.timestamp >= CACHE_DURATION) {
+      apiCache.delete(cachedKey);
+    }
+  }
+
+  // Maps iterate in insertion order, so re-inserting keeps the newest entries last
+  apiCache.delete(key);
+  apiCache.set(key, { data, timestamp: now });
+
+  while (apiCache.size > CACHE_MAX_ENTRIES) {
+    const oldestKey = apiCache.keys().next().value;
+    if (oldestKey === undefined) break;
+    apiCache.delete(oldestKey);
+  }
+};
 
 // Helper function to build full API URLs
 export const buildApiUrl = (endpoint: string): string => {
@@ -125,7 +145,7 @@ export const cachedFetch = async (url: string, options?: RequestInit): Promise<R
   // Cache successful responses
   if (response.ok) {
     const data = await response.clone().json();
-    apiCache.set(cacheKey, { data, timestamp: now });
+    setCachedResponse(cacheKey, data, now);
   }
   
   return response;
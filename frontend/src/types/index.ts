@@ -66,7 +66,8 @@ export interface ComicListItem {
   title: string;
   panel_count: number;
   has_cover: boolean;
-  cover_image?: string;
+  cover_url?: string;
+  panels: { id: number; image_url: string }[];
 }
 
 // API request/response types
@@ -79,6 +80,7 @@ export interface ComicArtRequest {
 export interface ComicArtResponse {
   success: boolean;
   image_data: string;
+  mime_type?: string;
   message: string;
 }
 